@@ -4,7 +4,14 @@ from langchain_community.vectorstores.chroma import Chroma
 from dotenv import load_dotenv
 import os
 import shutil
-from scrap import get_processed_text, url_extract
+from scrap import (
+    get_processed_text,
+    url_extract,
+    cached_url_extract,
+    PageCache,
+    USE_CACHE,
+    OFFLINE,
+)
 
 curr_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -83,19 +90,78 @@ def save_to_chroma(chunks: list[str], product: str, url: str, vector_store):
     return vector_store
 
 
-def url_data_updation(urls: list[str], product: str, vector_store):
+def url_data_updation(
+    urls: list[str],
+    product: str,
+    vector_store,
+    use_cache: bool = USE_CACHE,
+    offline: bool = OFFLINE,
+    force_reindex: bool = False,
+):
+    """
+    Fetch the given urls and index their text into the vector store.
+    Args:
+      urls (list[str]): urls to index.
+      product (str): product name saved in chunk metadata.
+      vector_store: Chroma store to save chunks to.
+      use_cache (bool): fetch pages with conditional GET through the page cache under
+        the store's persist_directory and skip unchanged pages. Pages are then fetched
+        with requests instead of selenium, so JS rendered content is not indexed.
+        default from SCRAP_USE_CACHE env
+      offline (bool): index only pages already in the page cache, never going to the
+        network. Implies use_cache. default from SCRAP_OFFLINE env
+      force_reindex (bool): index pages even if they match the page cache. default False
+    Returns:
+      dict: status with indexed, failed and unchanged urls.
+    """
     success_url = []
     failed_url = []
+    unchanged_url = []
     if type(urls) != list or len(urls) < 1:
         return {
             "status": "Failure",
             "indexed_url": [],
             "failed_url": [],
+            "unchanged_url": [],
             "error": "Please provide valid list of urls",
         }
+    cache = None
+    if use_cache or offline:
+        # keep the cache next to the store so a new or wiped store re-indexes every page
+        persist_directory = getattr(vector_store, "_persist_directory", None)
+        if persist_directory:
+            cache = PageCache(
+                os.path.join(persist_directory, "page_cache"), namespace=product
+            )
+            print(
+                f"Page cache active at {cache.path}: fetching raw html without selenium"
+                + (" (offline)" if offline else "")
+            )
+        elif offline:
+            return {
+                "status": "Failure",
+                "indexed_url": [],
+                "failed_url": urls,
+                "unchanged_url": [],
+                "error": "Offline mode needs a persisted vector store for the page cache",
+            }
+        else:
+            print("Page cache disabled: vector store is not persisted")
     for url in urls:
         try:
-            raw_data = url_extract(url)
+            if cache:
+                raw_data, changed, headers = cached_url_extract(
+                    url, cache, offline=offline, force_reindex=force_reindex
+                )
+                if type(raw_data) == dict:
+                    print("Error at url extraction", raw_data["error"], url)
+                    failed_url.append(url)
+                    continue
+                if not changed:
+                    unchanged_url.append(url)
+                    continue
+            else:
+                raw_data = url_extract(url)
             if type(raw_data) == dict:
                 if raw_data["status"] == False:
                     return raw_data
@@ -107,11 +173,20 @@ def url_data_updation(urls: list[str], product: str, vector_store):
             # else:
             documents = split_text(text)
             save_to_chroma(documents, product, url, vector_store)
+            if cache and not offline:
+                cache.put(url, raw_data, **headers)
             success_url.append(url)
         except Exception as e:
             print("Error at url extraction", e)
             failed_url.append(url)
-    return {"status": "success", "indexed_url": success_url, "failed_url": failed_url}
+    if cache:
+        cache.evict()
+    return {
+        "status": "success",
+        "indexed_url": success_url,
+        "failed_url": failed_url,
+        "unchanged_url": unchanged_url,
+    }
     # except Exception as e:
     #     return {}
 
@@ -4,10 +4,21 @@ from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
 import requests
 from bs4 import BeautifulSoup
 import re
+import os
+import gzip
+import json
+import time
+import hashlib
+import tempfile
 from urllib.parse import urljoin
 from minify_html import minify
 from inscriptis import get_text
 
+CACHE_MAX_BYTES = int(os.getenv("SCRAP_CACHE_MAX_MB", "200")) * 1024 * 1024
+USER_AGENT = "Mozilla/5.0 (Windows Phone 10.0; Android 4.2.1; Microsoft; Lumia 640 XL LTE) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/42.0.2311.135 Mobile Safari/537.36 Edge/12.10166"
+USE_CACHE = os.getenv("SCRAP_USE_CACHE", "").lower() in ("1", "true", "yes")
+OFFLINE = os.getenv("SCRAP_OFFLINE", "").lower() in ("1", "true", "yes")
+
 
 def get_processed_text(
     page_source: str,
@@ -90,7 +101,7 @@ def get_processed_text(
 def url_extract(
     url: str,
     wait: float = 2,
-    user_agent: str = "Mozilla/5.0 (Windows Phone 10.0; Android 4.2.1; Microsoft; Lumia 640 XL LTE) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/42.0.2311.135 Mobile Safari/537.36 Edge/12.10166",
+    user_agent: str = USER_AGENT,
     chrome: bool = False,
 ) -> str:
     """
@@ -148,7 +159,252 @@ def default_url_extract(url):
         }
 
 
+class PageCache:
+    """
+    On-disk cache of raw html pages keyed by url.
+
+    Every url is stored as a gzip compressed html file plus a small json file
+    holding the ETag, Last-Modified header and sha256 hash of the body, so that
+    re-crawls can send conditional requests and skip unchanged pages.
+    namespace separates entries of different products sharing the same directory.
+    Least recently used entries are removed by evict() once the cache grows above max_bytes.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        namespace: str = "",
+        max_bytes: int = CACHE_MAX_BYTES,
+    ):
+        self.path = path
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        os.makedirs(self.path, exist_ok=True)
+
+    def _key(self, url: str) -> str:
+        return hashlib.sha256((self.namespace + "\n" + url).encode("utf-8")).hexdigest()
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.path, key + ".json")
+
+    def _html_path(self, key: str) -> str:
+        return os.path.join(self.path, key + ".html.gz")
+
+    def _write(self, path: str, data: bytes):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def get_meta(self, url: str) -> dict:
+        """
+        Get stored metadata (etag, last_modified, body_hash, last_access) of url.
+
+        Returns (dict):
+          metadata, empty dict if url is not cached
+        """
+        key = self._key(url)
+        try:
+            with open(self._meta_path(key)) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not os.path.exists(self._html_path(key)):
+            return {}
+        return meta
+
+    def get(self, url: str):
+        """
+        Get cached html of url and mark it as recently used.
+
+        Returns (str | None):
+          html text, None if url is not cached
+        """
+        meta = self.get_meta(url)
+        if not meta:
+            return None
+        key = self._key(url)
+        try:
+            with gzip.open(self._html_path(key), "rb") as f:
+                content = f.read().decode("utf-8")
+        except Exception as e:
+            print("Error while reading page cache: ", e)
+            return None
+        self.touch(url, meta)
+        return content
+
+    def touch(self, url: str, meta: dict = None, **headers):
+        """
+        Mark url as recently used. Any given headers (etag, last_modified)
+        replace the stored ones as is, including None.
+        """
+        meta = meta or self.get_meta(url)
+        if not meta:
+            return
+        meta.update(headers)
+        meta["last_access"] = time.time()
+        self._write(self._meta_path(self._key(url)), json.dumps(meta).encode("utf-8"))
+
+    def put(self, url: str, content: str, etag: str = None, last_modified: str = None):
+        """
+        Store html of url along with its validators.
+        """
+        key = self._key(url)
+        body = content.encode("utf-8")
+        self._write(self._html_path(key), gzip.compress(body))
+        meta = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "body_hash": hashlib.sha256(body).hexdigest(),
+            "last_access": time.time(),
+        }
+        self._write(self._meta_path(key), json.dumps(meta).encode("utf-8"))
+
+    def evict(self):
+        """
+        Remove least recently used pages until the cache fits in max_bytes.
+        Meant to be called once after a crawl, as it reads every entry.
+        """
+        entries = []
+        total = 0
+        for name in os.listdir(self.path):
+            if not name.endswith(".json"):
+                continue
+            key = name[: -len(".json")]
+            try:
+                with open(self._meta_path(key)) as f:
+                    last_access = json.load(f).get("last_access", 0)
+                size = os.path.getsize(self._meta_path(key))
+                if os.path.exists(self._html_path(key)):
+                    size += os.path.getsize(self._html_path(key))
+            except (OSError, ValueError):
+                continue
+            entries.append((last_access, key, size))
+            total += size
+        for _, key, size in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            for path in (self._html_path(key), self._meta_path(key)):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+
+
+def cached_url_extract(
+    url: str,
+    cache: PageCache,
+    offline: bool = OFFLINE,
+    force_reindex: bool = False,
+    user_agent: str = USER_AGENT,
+    timeout: float = 30,
+):
+    """
+    Get raw html text (no JS rendering) using a conditional GET against the page cache.
+    The cache is not updated with a new page, call cache.put() once it has been processed.
+
+    Args:
+      url (str): The url from which html content is to be extracted
+      cache (PageCache): page cache holding the already processed pages
+      offline (bool): serve pages only from the cache without any network request. default from SCRAP_OFFLINE env
+      force_reindex (bool): report the page as changed even if it matches the cache. default False
+      user_agent (str): user agent. default USER_AGENT
+      timeout (float): request timeout in seconds. default is 30 sec.
+
+    Returns (tuple):
+      (html text or error dict, changed, headers). changed is False when the server
+      answered 304, the body hash matches the cached page or the page is replayed
+      offline, so processing can be skipped. headers holds the etag and last_modified
+      to pass to cache.put().
+    """
+    meta = cache.get_meta(url)
+    if offline:
+        content = cache.get(url)
+        if content is None:
+            return {
+                "error": "Page not available in offline cache",
+                "status": False,
+                "response": url,
+            }, False, {}
+        return content, force_reindex, {
+            "etag": meta.get("etag"),
+            "last_modified": meta.get("last_modified"),
+        }
+    if force_reindex:
+        meta = {}
+
+    request_headers = {"User-Agent": user_agent}
+    if meta.get("etag"):
+        request_headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        request_headers["If-Modified-Since"] = meta["last_modified"]
+    try:
+        response = requests.get(url, headers=request_headers, timeout=timeout)
+        if response.status_code == 304 and meta:
+            cache.touch(url, meta)
+            return None, False, {}
+        if response.status_code != 200:
+            return {
+                "error": "Can not extract Content from website",
+                "status": False,
+                "response": response.text,
+            }, False, {}
+        content = response.text
+        headers = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        body_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        if meta and meta.get("body_hash") == body_hash:
+            cache.touch(url, meta, **headers)
+            return content, False, headers
+        return content, True, headers
+    except Exception as e:
+        return {
+            "error": "Can not extract Content from website",
+            "status": False,
+            "response": str(e),
+        }, False, {}
+
+
+def cache_self_check():
+    """
+    Round-trip check of PageCache and offline cached_url_extract in a temp dir.
+    """
+    with tempfile.TemporaryDirectory() as path:
+        loan = PageCache(path, namespace="loan", max_bytes=10**6)
+        faq = PageCache(path, namespace="faq", max_bytes=10**6)
+        loan.put("https://a", "<html>a</html>", '"v1"', "Mon, 01 Jan 2024 00:00:00 GMT")
+        time.sleep(0.01)
+        loan.put("https://b", "<html>b</html>")
+        assert loan.get("https://a") == "<html>a</html>"
+        assert faq.get("https://a") is None
+
+        assert cached_url_extract("https://a", loan, offline=True) == (
+            "<html>a</html>",
+            False,
+            {"etag": '"v1"', "last_modified": "Mon, 01 Jan 2024 00:00:00 GMT"},
+        )
+        assert cached_url_extract("https://a", loan, offline=True, force_reindex=True)[1]
+        assert cached_url_extract("https://c", loan, offline=True)[0]["status"] == False
+
+        loan.touch("https://a", etag=None, last_modified=None)
+        assert loan.get_meta("https://a")["etag"] is None
+
+        # "https://a" was used last, so "https://b" is evicted first
+        loan.max_bytes = sum(
+            os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)
+        ) - 1
+        loan.evict()
+        assert loan.get("https://b") is None
+        assert loan.get("https://a") == "<html>a</html>"
+    print("Page cache self check passed")
+
+
 if __name__ == "__main__":
+    cache_self_check()
     urls = [
         "https://huyenchip.com/2024/07/25/genai-platform.html",
         "https://lilianweng.github.io/posts/2024-07-07-hallucination/",